@@ -32,10 +32,14 @@ Be sure to set your own values for CSV_PATH, CSV_ERROR_ADDRESSES, and SMTP_SERVE
 
 """
 
-__version__ = "0.4.1"
+__version__ = "0.5.16"
 
+import os
 import sys
+import atexit
 import time
+import queue
+import random
 import argparse
 import logging
 import logging.handlers
@@ -43,8 +47,9 @@ from time import sleep
 from pprint import pprint
 from threading import Thread
 from datetime import datetime
+from functools import lru_cache
 
-import RPi.GPIO as GPIO
+import gpiod
 
 import csv
 #import socket
@@ -62,13 +67,84 @@ CSV_ERROR_ADDRESSES={'from': 'freezer_monitor@example.edu', 'to': ['it-admins@ex
 #Set the address for the SMTP server to send messages from
 SMTP_SERVER = 'mailhub.it.example.edu'
 
+#Set how many seconds to wait for the SMTP server before treating the connection as dead
+#The connection is kept open between messages, so this stops a silently dropped one from blocking alerts
+SMTP_TIMEOUT = 30
+
+#Set whether to encrypt the connection with STARTTLS when the SMTP server supports it
+#If the STARTTLS handshake fails, messages are sent unencrypted instead
+SMTP_STARTTLS = True
+
+#Set how failed messages are retried
+#Each retry waits a random time of up to RETRY_BASE_DELAY * 2^attempt seconds, capped at RETRY_MAX_DELAY
+#The randomness keeps Pis that fail at the same time (e.g. during a mail server outage) from all retrying together
+RETRY_ATTEMPTS = 12
+RETRY_BASE_DELAY = 300
+RETRY_MAX_DELAY = 3600
+
+#Set the GPIO chip that the freezer's pin belongs to
+GPIO_CHIP = 'gpiochip0'
+
+#Set how many seconds to wait for an edge before checking the pin anyway
+#This catches any state change that was ignored as a bounce or missed by the kernel
+PIN_CHECK_INTERVAL = 60
+
+#Set the minimum number of seconds between two events with the same status
+#Edges closer together than this are treated as switch bounce and ignored
+DEBOUNCE_TIME = 2
+
+#Set the subject and body of the warning and all-clear messages
+#{loc} is replaced with the freezer's location and {t} with the time the event was detected
+WARN_SUBJ = 'ALERT: Problem with freezer in {loc}'
+WARN_BODY = ('A potential problem has been detected with the freezer located in: {loc}'
+	'\nThis event was detected at: {t}')
+CLEAR_SUBJ = 'Re: ALERT: Problem with freezer in {loc}'
+CLEAR_BODY = ('The problem detected with the freezer located in: {loc} appears to have been resolved.'
+	'\nThis resolution was detected at: {t}'
+	'\nPlease check this freezer to confirm that it is now working properly.')
+
+#Per-status text, indexed by status: 0 for all-clear, 1 for warning
+_MSG_TYPES = ('all-clear', 'warning')
+_SUBJECTS = (CLEAR_SUBJ, WARN_SUBJ)
+_BODIES = (CLEAR_BODY, WARN_BODY)
+_BACKUP_SUMMARIES = (
+	'A problem with a -80 freezer has been resolved, but the all-clear message failed to send',
+	'A problem has been detected with a freezer, but the warning message failed to send')
+_CSV_ERROR_NOTES = (
+	'Note that this message indicates the resolution of a potential problem with the freezer connected to this RaspberryPi. Please notify the appropriate lab members to confirm that the freezer is now working properly.',
+	'Also note that this message indicates a potential problem with the freezer connected to this RaspberryPi. Please check the freezer or notify the appropriate lab members immediately.')
+
 #Set up logging
+#Records are queued and written by a background thread, so a slow syslog never blocks event handling
 my_logger = logging.getLogger('MyLogger')
 my_logger.setLevel(logging.DEBUG)
 handler = logging.handlers.SysLogHandler(address = '/dev/log')	#Print to syslog
 std_handler = logging.StreamHandler(sys.stdout)			#Print to stdout
-my_logger.addHandler(handler)
-my_logger.addHandler(std_handler)
+log_queue = queue.Queue(-1)
+my_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(log_queue, handler, std_handler)
+log_listener.start()
+atexit.register(log_listener.stop)	#Flush any queued records on exit
+
+#Parsed CSV files, keyed by (path, modification time) so edits to the file are picked up
+_CSV_CACHE = {}
+
+#Local IP address of this Pi, looked up on first use by get_local_ip()
+_LOCAL_IP = None
+
+#Connection to SMTP_SERVER, kept open between messages by _get_smtp()
+#Only used from the event handling thread, so it needs no locking
+_SMTP = None
+
+#Freezer events waiting to be handled by the event handling thread, see _worker()
+#Each event is a (status, event_time) tuple, with the time taken when the change was detected
+_EVENT_QUEUE = queue.Queue(maxsize=8)
+
+#Last state queued from the monitored pin, used to ignore edges that don't change it
+#Starts at 0 so that the first reading is only queued if it is 1 (see monitor())
+_last_status = 0
+#Time at which each status was last queued, used to debounce the switch
+_last_queued = {0: None, 1: None}
 
 
 def parse_info(csv_file):
@@ -82,30 +158,193 @@ def parse_info(csv_file):
 
 	Returns
 	-------
-	entries: list
-		A list of dictionaries, one for each row
-		Each dictionary's keys are the column headers from the file's first row
+	columns: dict
+		Maps each column header from the file's first row to a list of that column's values, one for each row
+		Values in the Email and Backup Email columns are lists of addresses
+	ip_index: dict
+		Maps each row's IP field to that row's index in the lists in columns
+	
+	Both values are cached until the file's modification time changes
 
 	"""
 
-	reader = csv.reader(open(csv_file, 'rU'))
-	rows = []
-	for row in reader:
-		rows.append(row)
-	header = rows.pop(0)
-	entries = []
-	for row in rows:
-		entry = {}
-		for i in range(len(row)):
-			entry[header[i]] = row[i]
-		entries.append(entry)
-	return entries
+	key = (csv_file, os.stat(csv_file).st_mtime_ns)
+	hit = _CSV_CACHE.get(key)
+	if hit is not None:
+		return hit
+
+	with open(csv_file, newline='') as f:
+		reader = csv.reader(f)
+		header = next(reader)
+		columns = {h: [] for h in header}
+		for row in reader:
+			if not row:
+				continue
+			#Pad short rows so that every column stays the same length
+			row += [''] * (len(header) - len(row))
+			for h, value in zip(header, row):
+				columns[h].append(value)
+	#Split multiple email addresses into lists once here, rather than on every event
+	for h in ('Email', 'Backup Email'):
+		if h in columns:
+			columns[h] = [[a.strip() for a in value.split(',') if a.strip()] for value in columns[h]]
+	ip_index = {ip: i for i, ip in enumerate(columns['IP'])}
+
+	#Drop any stale versions of this file before caching the new one
+	for stale in [k for k in _CSV_CACHE if k[0] == csv_file]:
+		del _CSV_CACHE[stale]
+	_CSV_CACHE[key] = (columns, ip_index)
+	return columns, ip_index
+
+
+def get_local_ip(refresh=False):
+	"""Detect the local IP address of the Raspberry Pi
+	The address is looked up once and reused, since it will not normally change while the script runs
+	
+	Parameters
+	----------
+	refresh : bool
+		If True, discard any cached address and look it up again
+	
+	Returns
+	-------
+	ip : string
+		The IPv4 address assigned to eth0
+	
+	"""
+	global _LOCAL_IP
+	if refresh or _LOCAL_IP is None:
+		_LOCAL_IP = ni.ifaddresses('eth0')[ni.AF_INET][0]['addr']
+		#If netifaces is not installed, the line below can be used to detect the local IP instead
+		#_LOCAL_IP = ([(s.connect(('8.8.8.8', 80)), s.getsockname()[0], s.close()) for s in [socket.socket(socket.AF_INET, socket.SOCK_DGRAM)]][0][1])
+	return _LOCAL_IP
+
+
+def retry_delay(attempt):
+	"""Pick how long to wait before retrying a message that failed to send
+	Uses exponential backoff with full jitter, bounded by RETRY_MAX_DELAY
+	
+	Parameters
+	----------
+	attempt : int
+		The number of the attempt that just failed, starting from 0
+	
+	Returns
+	-------
+	delay : float
+		The number of seconds to wait
+	
+	"""
+	return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _get_smtp():
+	"""Get a connection to SMTP_SERVER
+	Reuses the existing connection if it still answers a NOOP, otherwise opens a new one
+	New connections are upgraded with STARTTLS if SMTP_STARTTLS is set and the server supports it
+	If the upgrade fails, the connection is closed and reopened without encryption
+	
+	Parameters
+	----------
+	None
+	
+	Returns
+	-------
+	smtp : smtplib.SMTP
+		A connected SMTP client
+	
+	"""
+	global _SMTP
+	if _SMTP is not None:
+		try:
+			if _SMTP.noop()[0] == 250:
+				return _SMTP
+		except (smtplib.SMTPException, OSError):
+			pass
+		_SMTP.close()
+		_SMTP = None
+	smtp = smtplib.SMTP(SMTP_SERVER, timeout=SMTP_TIMEOUT)
+	if SMTP_STARTTLS:
+		try:
+			smtp.ehlo()
+			if smtp.has_extn('starttls'):
+				smtp.starttls()
+				smtp.ehlo()
+		except (smtplib.SMTPException, OSError) as e:
+			#Don't let a broken STARTTLS stop alerts from going out, send them unencrypted instead
+			my_logger.warning('STARTTLS with %s failed, falling back to an unencrypted connection: %s', SMTP_SERVER, e)
+			smtp.close()
+			smtp = smtplib.SMTP(SMTP_SERVER, timeout=SMTP_TIMEOUT)
+	_SMTP = smtp
+	return _SMTP
+
+
+def _render(status, location, event_time, reply_to):
+	"""Render a warning or all-clear message, ready to be passed to sendmail()
+	send_mail() renders the message once, before its retry loop
+	
+	Parameters
+	----------
+	status : int
+		1 for a warning message, 0 for an all-clear message
+	location : string
+		The physical location (room number) of the freezer
+	event_time : string
+		The time at which the event was detected
+	reply_to : string
+		The value of the message's reply-to field
+	
+	Returns
+	-------
+	msg : string
+		The full text of the message, including headers
+	
+	"""
+	msg = MIMEText(_BODIES[status].format(loc=location, t=event_time))
+	msg['Subject'] = _SUBJECTS[status].format(loc=location)
+	msg['reply-to'] = reply_to
+	return msg.as_string()
+
+
+@lru_cache(maxsize=32)
+def _render_backup(status, location, event_time, recipients, reply_to):
+	"""Render the message telling the backup contact that a warning or all-clear message failed to send
+	Results are cached, so retrying a message doesn't render it again
+	
+	Parameters
+	----------
+	status : int
+		1 if the failed message was a warning, 0 if it was an all-clear
+	location : string
+		The physical location (room number) of the freezer
+	event_time : string
+		The time at which the event was detected
+	recipients : tuple
+		The email addresses that the failed message was intended for
+	reply_to : string
+		The value of the message's reply-to field
+	
+	Returns
+	-------
+	msg : string
+		The full text of the message, including headers
+	
+	"""
+	msg = MIMEText(
+		f'{_BACKUP_SUMMARIES[status]}\n'
+		f'\nFreezer Location: {location}'
+		f'\nIntended Recipient(s): {", ".join(recipients)}'
+		f'\nTime of Event: {event_time}')
+	msg['Subject'] = f'ALERT: Failed to send notification about the status of freezer in {location}'
+	msg['reply-to'] = reply_to
+	return msg.as_string()
 
 
 def send_mail(status, recipients, sender, reply_to, backup, location, event_time):
 	"""Send a warning or all-clear message, depending on the switch status
 	If the message fails to send, send a message to the backup contact
-	If that message fails to send, try the original message again in 5 minutes
+	If that message fails to send, try the original message again after a randomized delay from retry_delay()
+	Gives up after RETRY_ATTEMPTS attempts
 	
 	Parameters
 	----------
@@ -137,54 +376,38 @@ def send_mail(status, recipients, sender, reply_to, backup, location, event_time
 	
 	"""
 	
-	my_logger.debug('Attempting to send mail to ' + str(recipients))
+	msg_type = _MSG_TYPES[status]
+	my_logger.debug('Attempting to send mail to %s', recipients)
 		
-	if status == 1:
-		msg = 'A potential problem has been detected with the freezer located in: ' + str(location)
-		msg += '\nThis event was detected at: ' + str(event_time)
-		msg = MIMEText(msg)
-		msg['Subject'] = ('ALERT: Problem with freezer in ' + str(location))
-	elif status == 0:
-		msg = 'The problem detected with the freezer located in: ' + str(location) + ' appears to have been resolved.'
-		msg += '\nThis resolution was detected at: ' + str(event_time)
-		msg += '\nPlease check this freezer to confirm that it is now working properly.'
-		msg = MIMEText(msg)
-		msg['Subject'] = ('Re: ALERT: Problem with freezer in ' + str(location))
-		
-	msg['reply-to'] = reply_to
+	msg = _render(status, location, event_time, reply_to)
 	
-	s = smtplib.SMTP(SMTP_SERVER)
-	try:
-		s.sendmail(sender, recipients, msg.as_string())
-		my_logger.info('Sent mail to: ' + str(recipients) + '		 For freezer in: ' + str(location))
-	except:
-		my_logger.warning('Failed to send ' + str(msg_type) + ' message to ' + str(recipients))
+	for attempt in range(RETRY_ATTEMPTS):
+		try:
+			_get_smtp().sendmail(sender, recipients, msg)
+			my_logger.info('Sent mail to: %s		 For freezer in: %s', recipients, location)
+			return
+		except (smtplib.SMTPException, OSError) as e:
+			my_logger.warning('Failed to send %s message to %s: %s', msg_type, recipients, e)
 		try:
-			if status == 1:
-				msg = 'A problem has been detected with a freezer, but the warning message failed to send\n'
-			elif status == 0:
-				msg = 'A problem with a -80 freezer has been resolved, but the all-clear message failed to send=\n'
-			msg += '\nFreezer Location: ' + str(location)
-			msg += '\nIntended Recipient(s): ' + str(recipients)
-			msg += '\nTime of Event: ' + str(event_time)
-			msg = MIMEText(msg)
-			msg['Subject'] = ('ALERT: Failed to send notification about the status of freezer in ' + str(location))
-			msg['reply-to'] = reply_to
-			s.sendmail(sender, backup, msg.as_string())
-			my_logger.info('Sent message failure warning to ' + str(backup) + ' for freezer in: ' + str(location))
-		except:
-			if status == 1:
-				my_logger.critical('Failed to alert backup contact that a warning message failed to send. Trying original message again in 5 minutes.')
-			if status == 0:
-				my_logger.critical('Failed to alert backup contact that an all-clear message failed to send. Trying original message again in 5 minutes.')
-			time.sleep(300)
-			send_mail(status, recipients, sender, reply_to, backup, location, event_time)
+			backup_msg = _render_backup(status, location, event_time, tuple(recipients), reply_to)
+			_get_smtp().sendmail(sender, backup, backup_msg)
+			my_logger.info('Sent message failure warning to %s for freezer in: %s', backup, location)
+			return
+		except (smtplib.SMTPException, OSError) as e:
+			my_logger.warning('Failed to send message failure warning to %s: %s', backup, e)
+			if attempt == RETRY_ATTEMPTS - 1:
+				break
+			delay = retry_delay(attempt)
+			my_logger.critical('Failed to alert backup contact that the %s message failed to send. Trying original message again in %d seconds.', msg_type, delay)
+			time.sleep(delay)
+	my_logger.critical('Giving up on message to %s after %d attempts', recipients, RETRY_ATTEMPTS)
 
 
 def handle_csv_error(status, ip, event_time):
 	"""Handle any errors encountered while reading the CSV file
 	Send mail to backup contact about the CSV error and the freezer event
-	If the message fails to send, wait 15 minutes and try again
+	If the message fails to send, try again after a randomized delay from retry_delay()
+	Gives up after RETRY_ATTEMPTS attempts
 	
 	Parameters
 	----------
@@ -206,43 +429,44 @@ def handle_csv_error(status, ip, event_time):
 	
 	"""
 	my_logger.critical('!!! Failed to read CSV File !!!')
-	try:
-		msg = 'Failure to read CSV file on RaspberryPi at IP: ' + str(ip)
-		msg += '\nEvent Time: ' + str(event_time)
-		msg += '\n\nPlease verify the contents and structure of the CSV file ASAP.	Alert messages for freezer events cannot be sent until this error is resolved.'
-		if status == 1:
-			msg += '\n\nAlso note that this message indicates a potential problem with the freezer connected to this RaspberryPi. Please check the freezer or notify the appropriate lab members immediately.'
-		elif status == 0:
-			msg += '\n\nNote that this message indicates the resolution of a potential problem with the freezer connected to this RaspberryPi. Please notify the appropriate lab members to confirm that the freezer is now working properly.'
-		msg = MIMEText(msg)
-		
-		msg['Subject'] = ('Error reading CSV file on Freezer RPi at IP' + str(ip))
-		msg['reply-to'] = CSV_ERROR_ADDRESSES['reply_to']
-		sender = CSV_ERROR_ADDRESSES['from']
-		recipients = CSV_ERROR_ADDRESSES['to']
-		if type(recipients) == string:
-			recipients = [recipients]
-		s = smtplib.SMTP(SMTP_SERVER)
-		s.sendmail(sender, recipients, msg.as_string())
-		my_logger.info('Sent warning to ' + str(recipeints))
-		sleep(900)
-		handle_event(status)
-	except:
-		my_logger.critical('!!! Failed to read CSV File and failed to alert ' + str(recipients) + ' !!!')
-		sleep(900)
-		handle_event(status)
+	lines = [
+		f'Failure to read CSV file on RaspberryPi at IP: {ip}',
+		f'Event Time: {event_time}',
+		'',
+		'Please verify the contents and structure of the CSV file ASAP.	Alert messages for freezer events cannot be sent until this error is resolved.',
+		'',
+		_CSV_ERROR_NOTES[status],
+	]
+	msg = MIMEText('\n'.join(lines))
+	
+	msg['Subject'] = f'Error reading CSV file on Freezer RPi at IP {ip}'
+	msg['reply-to'] = CSV_ERROR_ADDRESSES['reply_to']
+	sender = CSV_ERROR_ADDRESSES['from']
+	recipients = CSV_ERROR_ADDRESSES['to']
+	if isinstance(recipients, str):
+		recipients = [recipients]
+	
+	for attempt in range(RETRY_ATTEMPTS):
+		try:
+			_get_smtp().sendmail(sender, recipients, msg.as_string())
+			my_logger.info('Sent warning to %s', recipients)
+			return
+		except (smtplib.SMTPException, OSError) as e:
+			my_logger.critical('!!! Failed to read CSV File and failed to alert %s !!! %s', recipients, e)
+			if attempt < RETRY_ATTEMPTS - 1:
+				sleep(retry_delay(attempt))
 
 				
 			
-def handle_event(status):
-	"""Called by the monitor() function whenever the status of the freezer changes
+def handle_event(status, event_time):
+	"""Called by _worker() whenever the status of the freezer changes
 	Also called if the freezer is in error status when this script starts
-	This function should always be run in its own thread in case another freezer event occurs before it finishes
+	Runs on the event handling thread, so a freezer event that occurs before it finishes is queued until it returns
 	Does the following in order:
-		Store the current time (at which the event was detected)
-		Detect the local IP address
+		Detect the local IP address with get_local_ip()
 		Parse the CSV file with parse_info()
-		If any rows in the CSV file have an IP field matching the local IP:
+			If it can't be parsed, alert the CSV error contact with handle_csv_error() and try again in 15 minutes
+		If a row in the CSV file has an IP field matching the local IP:
 			Send an email to the corresponding addresses with send_mail()
 	
 	Parameters
@@ -251,100 +475,172 @@ def handle_event(status):
 		This should be either a 0 or 1
 		1 indicates a problem and will trigger a warning message
 		0 indicates a resolved problem and will trigger an all-clear message
+	event_time : string
+		The time at which the event was detected by _check_pin()
+		This may be well before handle_event() is called if earlier events are still being retried
 	
 	Returns
 	-------
 	None
 	
 	"""
-	event_time = time.asctime()
-	my_logger.info('Freezer event detected at ' + str(event_time))
+	my_logger.info('Freezer event detected at %s', event_time)
 	
-	#Detect the local IP address
-	ip = ni.ifaddresses('eth0')[2][0]['addr']
-	#If netifaces is not installed, the line below can be used to detect the local IP instead
-	#ip = ([(s.connect(('8.8.8.8', 80)), s.getsockname()[0], s.close()) for s in [socket.socket(socket.AF_INET, socket.SOCK_DGRAM)]][0][1])
-	
-	my_logger.debug('Detected local IP address of ' + str(ip))
+	ip = get_local_ip()
+	my_logger.debug('Detected local IP address of %s', ip)
 	parsed_csv = False
 	while not parsed_csv:
 		try:
-			info = parse_info(CSV_PATH)
+			columns, ip_index = parse_info(CSV_PATH)
 			parsed_csv = True
 			my_logger.debug('Finished parsing CSV file')
-		except:
+		except (OSError, csv.Error, UnicodeDecodeError, StopIteration, KeyError) as e:
+			my_logger.warning('Failed to parse CSV file %s: %r', CSV_PATH, e)
 			handle_csv_error(status, ip, event_time)
+			sleep(900)
 						
-	for i in range(len(info)):
-		if info[i]['IP'] == ip:
-			recipients = ((info[i]['Email']).split(', '))
-			location = (info[i]['Location'])
-			department = (info[i]['Department'])
-			sender = (info[i]['From Email'])
-			reply_to = ((info[i]['Reply-To Email'])
-			backup = ((info[i]['Backup Email']).split(', '))
-			send_mail(status, recipients, sender, reply_to, backup, location, event_time)
+	row = ip_index.get(ip)
+	if row is None:
+		#The address may have changed since it was cached, so look it up again before giving up
+		ip = get_local_ip(refresh=True)
+		row = ip_index.get(ip)
+	if row is not None:
+		recipients = columns['Email'][row]
+		location = columns['Location'][row]
+		department = columns['Department'][row]
+		sender = columns['From Email'][row]
+		reply_to = columns['Reply-To Email'][row]
+		backup = columns['Backup Email'][row]
+		send_mail(status, recipients, sender, reply_to, backup, location, event_time)
 	
 
 def gpio_setup(PIN):
-	"""Setup the GPIO pins
+	"""Setup the GPIO line
 	
 	Parameters
 	----------
 	PIN : int
-		The board number of the GPIO pin used to detect the freezer's status
+		The line offset (BCM number) of the GPIO pin used to detect the freezer's status
 	
 	Returns
 	-------
-	None
+	line : gpiod.Line
+		The line, requested as an input that reports both rising and falling edges
 	
 	"""
 	
-	#Set the pin numbering system to use (GPIO.BOARD or GPIO.BCM)
-	GPIO.setmode(GPIO.BOARD)
+	#This script uses the libgpiod 1.x Python API (1.5 or newer), which was removed in libgpiod 2.0
+	if not hasattr(gpiod, 'LINE_REQ_EV_BOTH_EDGES'):
+		my_logger.critical('!!! Unsupported libgpiod Python bindings: version 1.5 or newer, but older than 2.0, is required !!!')
+		sys.exit(1)
 	
-	#Disable GPIO warning messages (not really sure what these messages would be, but disabling them appears to be standard practice)
-	GPIO.setwarnings(False)
+	chip = gpiod.Chip(GPIO_CHIP)
+	line = chip.get_line(PIN)
 	
-	#Set the pin as an input with no internal pull-up or pull-down
-	GPIO.setup(PIN, GPIO.IN, pull_up_down=GPIO.PUD_OFF)
+	#Request the line as an input with no internal pull-up or pull-down, and have the kernel report every edge
+	#The bias must be disabled explicitly, otherwise the pin keeps its power-on pull (a pull-down on line 17)
+	line.request(consumer='freezer_monitor', type=gpiod.LINE_REQ_EV_BOTH_EDGES, flags=gpiod.LINE_REQ_FLAG_BIAS_DISABLE)
 	
-	#Uncomment these lines to set a pull-down on all unmonitored pins
-	#for i in [3, 5, 7, 11, 13, 15, 19, 21, 23, 29, 31, 33, 35, 37, 8, 10, 12, 16, 18, 22, 24, 26, 32, 36, 38, 40]:
+	#Uncomment these lines to set a pull-down on all unmonitored pins (requires libgpiod 1.5 or newer)
+	#for i in [2, 3, 4, 17, 27, 22, 10, 9, 11, 5, 6, 13, 19, 26, 14, 15, 18, 23, 24, 25, 8, 7, 12, 16, 20, 21]:
 	#	if i != PIN:
-	#		GPIO.setup(i, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)			
+	#		chip.get_line(i).request(consumer='freezer_monitor', type=gpiod.LINE_REQ_DIR_IN, flags=gpiod.LINE_REQ_FLAG_BIAS_PULL_DOWN)
 	
+	return line
 			
-def monitor(PIN):
-	"""Monitor a given GPIO pin for changes in its state
-	Launch a new handle_event() thread when the state changes, passing the state as an argument
+
+def _check_pin(line):
+	"""Read the monitored line and queue its state for the event handling thread if it has changed
+	Changes within DEBOUNCE_TIME of the last event with the same state are ignored as switch bounce
+	If the queue is full, the oldest queued event is dropped to make room for the new one
 	
 	Parameters
 	----------
-	PIN : int
-		The board number of the GPIO pin used to detect the freezer's status
+	line : gpiod.Line
+		The line used to detect the freezer's status, as returned by gpio_setup()
 		
+	Returns
+	-------
+	ignored : bool
+		True if a change was ignored as a bounce and the line should be checked again once it settles
+	
+	"""
+	global _last_status
+	status = line.get_value()
+	if status == _last_status:
+		return False
+	now = time.monotonic()
+	last = _last_queued[status]
+	if last is not None and now - last < DEBOUNCE_TIME:
+		return True
+	event = (status, time.asctime())
+	try:
+		_EVENT_QUEUE.put_nowait(event)
+	except queue.Full:
+		#Drop the oldest queued event instead, so that the latest state is never the one that is lost
+		#This is the only thread that queues events, so there is room for the put once one is removed
+		try:
+			dropped_status, dropped_time = _EVENT_QUEUE.get_nowait()
+			my_logger.warning('Event queue is full, dropping oldest queued status change to: %s detected at %s', dropped_status, dropped_time)
+		except queue.Empty:
+			pass
+		_EVENT_QUEUE.put_nowait(event)
+	_last_status = status
+	_last_queued[status] = now
+	my_logger.info('Status changed to: %s , handling event', status)
+	return False
+
+
+def _worker():
+	"""Handle queued freezer events one at a time, in the order they occurred
+	Runs forever on the event handling thread started by monitor()
+	
+	Parameters
+	----------
+	None
+	
 	Returns
 	-------
 	None
 	
 	"""
-	a = GPIO.input(PIN)
-	if a == 1:
-	#If the initial reading is 1, handle an event
+	while True:
+		status, event_time = _EVENT_QUEUE.get()
+		try:
+			handle_event(status, event_time)
+		except Exception:
+			my_logger.exception('Unexpected error while handling event with status: %s', status)
+
+
+def monitor(line):
+	"""Monitor a given GPIO line for changes in its state
+	Start the event handling thread and queue an event for the initial state if necessary
+	Then block until the kernel reports an edge, and check the line with _check_pin()
+	The line is also checked every PIN_CHECK_INTERVAL seconds, or DEBOUNCE_TIME seconds after a bounce was ignored
+	
+	Parameters
+	----------
+	line : gpiod.Line
+		The line used to detect the freezer's status, as returned by gpio_setup()
+		
+	Returns
+	-------
+	None
+	
+	"""
+	worker_thread=Thread(target=_worker, name='Event Handling Thread')
+	worker_thread.daemon = True
+	worker_thread.start()
+	
+	#If the initial reading is 1, handle an event, timestamped with the startup time
 	#Necessary for detecting a problem after recovering from a power outage
-		event_thread=Thread(target=handle_event, args=(1,), name='Event Handling Thread')
-		event_thread.daemon = True
-		event_thread.start()
+	_check_pin(line)
+	
+	settling = False
 	while True:
-		b = GPIO.input(PIN)
-		if a != b:
-			my_logger.info('Status changed to: ' + str(b) + ' , handling event')
-			event_thread=Thread(target=handle_event, args=(b,))
-			event_thread.daemon = True
-			event_thread.start()
-		a = b
-		time.sleep(0.1)
+		if line.event_wait(sec=DEBOUNCE_TIME if settling else PIN_CHECK_INTERVAL):
+			line.event_read()
+		settling = _check_pin(line)
 
 
 def main():
@@ -368,9 +664,10 @@ def main():
 	parser.add_argument('-V', '--version', action='version', version=__version__)
 	parser.parse_args()
 
-	PIN = 11
-	gpio_setup(PIN)
-	monitor(PIN)
+	#Line 17 on gpiochip0 is physical pin 11 on a Raspberry Pi model B+
+	PIN = 17
+	line = gpio_setup(PIN)
+	monitor(line)
 
 if __name__ == '__main__':
 	main()